@@ -1,11 +1,15 @@
-from flask import Flask, request, render_template, redirect, url_for, send_from_directory
+from flask import Flask, request, render_template, redirect, url_for, send_from_directory, jsonify
 import os
+from urllib.parse import urlsplit
 from werkzeug.utils import secure_filename
 from wms_logic import WMSLogic
+from unmapped_sku_tracker import UnmappedSKUTracker
+from unmapped_row_index import UnmappedRowIndex
 
 # --- Configuration ---
 UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'csv'}
+UNMAPPED_PER_PAGE = 50
 
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
@@ -15,6 +19,12 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def unmapped_page_args():
+    """Reads the page and per_page query parameters for the unmapped SKU views."""
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', UNMAPPED_PER_PAGE, type=int), 1), 500)
+    return page, per_page
+
 # --- Routes ---
 @app.route('/')
 def index():
@@ -44,7 +54,43 @@ def add_mapping():
     with open('wms_mapping.csv', mode='a', newline='') as outfile:
         writer = csv.writer(outfile)
         writer.writerow([sku, msku])
-    return redirect(url_for('sku_mappings'))
+    UnmappedSKUTracker('unmapped_skus.db').remove([sku])
+
+    # Patch only the already processed rows that were waiting for this SKU,
+    # and push just those rows downstream.
+    remapped_filepaths = UnmappedRowIndex('unmapped_rows.db').remap({sku: msku})
+    if remapped_filepaths:
+        if os.environ.get("TEABLE_API_TOKEN") and os.environ.get("TEABLE_BASE_ID"):
+            from load_data import load_data_to_teable
+            for remapped_filepath in remapped_filepaths:
+                print(f"Attempting to load remapped rows from {remapped_filepath} to Teable.io...")
+                load_data_to_teable(remapped_filepath)
+        else:
+            print("Skipping Teable.io load of remapped rows: TEABLE_API_TOKEN or TEABLE_BASE_ID not set.")
+    # Only return to the unmapped SKUs page; anything else could redirect off-site.
+    next_url = request.form.get('next', '')
+    parts = urlsplit(next_url)
+    if parts.scheme or parts.netloc or parts.path != url_for('unmapped_skus'):
+        next_url = url_for('sku_mappings')
+    return redirect(next_url)
+
+
+@app.route('/unmapped')
+def unmapped_skus():
+    """Renders the unmapped SKU workbench, ranked by affected units."""
+    page, per_page = unmapped_page_args()
+    rows, total = UnmappedSKUTracker('unmapped_skus.db').top(per_page, (page - 1) * per_page)
+    pages = max((total + per_page - 1) // per_page, 1)
+    return render_template('unmapped.html', unmapped=rows, total=total,
+                           page=page, pages=pages, per_page=per_page)
+
+
+@app.route('/api/unmapped')
+def unmapped_skus_api():
+    """Returns one page of unmapped SKUs, ranked by affected units, as JSON."""
+    page, per_page = unmapped_page_args()
+    rows, total = UnmappedSKUTracker('unmapped_skus.db').top(per_page, (page - 1) * per_page)
+    return jsonify({'page': page, 'per_page': per_page, 'total': total, 'results': rows})
 
 
 @app.route('/delete_mapping', methods=['POST'])
@@ -0,0 +1,179 @@
+import csv
+import os
+import re
+from sales_data_processor import COLUMN_RENAMES, STANDARDIZED_COLS, detect_format, summarize_mapping
+from unmapped_row_index import UnmappedRowIndex
+from unmapped_sku_tracker import UnmappedSKUTracker
+
+PROCESSED_COLS = STANDARDIZED_COLS + ['msku']
+
+# Cells pandas.read_csv reads as missing by default.
+PANDAS_NA_VALUES = {'', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+                    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'}
+INT_PATTERN = re.compile(r'[+-]?\d+')
+FLOAT_PATTERN = re.compile(r'[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?')
+
+def normalize_like_pandas(rows: list[dict]):
+    """
+    Rewrites standardized rows in place so that saving them gives the same
+    file as the pandas engine: missing cells become None, and quantities are
+    formatted the way pandas infers them (a column of whole numbers with a
+    gap becomes float, so 10 is written as 10.0). SKUs and dates are kept
+    as text.
+    """
+    for row in rows:
+        for col in STANDARDIZED_COLS:
+            if row[col] in PANDAS_NA_VALUES:
+                row[col] = None
+
+    quantities = [row['quantity'] for row in rows if row['quantity'] is not None]
+    if all(INT_PATTERN.fullmatch(q) for q in quantities):
+        has_gaps = len(quantities) < len(rows)
+        convert = (lambda q: repr(float(q))) if has_gaps else (lambda q: str(int(q)))
+    elif all(FLOAT_PATTERN.fullmatch(q) for q in quantities):
+        convert = lambda q: repr(float(q))
+    else:
+        return
+    for row in rows:
+        if row['quantity'] is not None:
+            row['quantity'] = convert(row['quantity'])
+
+class DictSKUMapper:
+    """
+    A pure-stdlib SKU to MSKU mapper backed by a dict, for small inputs
+    where importing pandas would cost more than the mapping itself.
+    """
+    def __init__(self, mapping_filepath: str):
+        """
+        Initializes the mapper by loading the mapping file.
+
+        Args:
+            mapping_filepath: The path to the SKU to MSKU mapping CSV file.
+        """
+        self.mapping = None
+        if not os.path.exists(mapping_filepath):
+            print(f"Error: Mapping file not found at {mapping_filepath}")
+            return
+
+        try:
+            mapping = {}
+            with open(mapping_filepath, newline='', encoding='utf-8-sig') as infile:
+                for row in csv.DictReader(infile):
+                    # Like SKUMapper, the first mapping for a SKU wins.
+                    mapping.setdefault(row['sku'], row['msku'] or None)
+            self.mapping = mapping
+        except Exception as e:
+            print(f"An error occurred while loading the mapping file: {e}")
+
+    def get_msku(self, sku: str) -> str | None:
+        """Gets the MSKU for a given SKU, or None if not found."""
+        if self.mapping is None:
+            return None
+        return self.mapping.get(sku)
+
+class FastWMSLogic:
+    """
+    A pure-stdlib counterpart of WMSLogic with the same interface, used by
+    the command-line tool for small files.
+    """
+    def __init__(self, mapping_filepath: str = 'wms_mapping.csv'):
+        self.mapper = DictSKUMapper(mapping_filepath)
+        self.unmapped_tracker = UnmappedSKUTracker('unmapped_skus.db')
+        self.row_index = UnmappedRowIndex('unmapped_rows.db')
+        self.marketplace = None
+        self.sales_rows = None
+        self.processed_rows = None
+        self.unmapped_skus = []
+        self.unmapped_rows = []
+        self.unmapped_locations = {}
+
+    def load_and_process_sales_data(self, filepath: str) -> tuple[bool, str]:
+        """
+        Loads a sales data file and standardizes its rows.
+
+        Args:
+            filepath: The path to the sales data CSV.
+
+        Returns:
+            A tuple (success, message).
+        """
+        if not os.path.exists(filepath):
+            return False, "Error: File not found."
+
+        try:
+            with open(filepath, newline='', encoding='utf-8-sig') as infile:
+                reader = csv.DictReader(infile)
+                file_format = detect_format(set(reader.fieldnames or []))
+                if file_format is None:
+                    print(f"Error: Could not determine file format for {filepath}")
+                    return False, f"Error: Could not process file '{os.path.basename(filepath)}'. The format might be unsupported."
+                source_cols = {std: src for src, std in COLUMN_RENAMES[file_format].items()}
+                self.sales_rows = [{col: row[source_cols[col]] for col in STANDARDIZED_COLS} for row in reader]
+            normalize_like_pandas(self.sales_rows)
+        except Exception as e:
+            print(f"An error occurred while processing {filepath}: {e}")
+            return False, f"Error: Could not process file '{os.path.basename(filepath)}'. The format might be unsupported."
+
+        self.marketplace = file_format
+        return True, f"Successfully processed {os.path.basename(filepath)}."
+
+    def process_data(self) -> tuple[bool, str]:
+        """
+        Maps the SKUs of the loaded sales rows to MSKUs.
+
+        Returns:
+            A tuple (success, message).
+        """
+        if self.sales_rows is None:
+            return False, "Error: No sales data loaded to process."
+
+        if self.mapper.mapping is None:
+            return False, "Error: SKU mapping data is not available."
+
+        get_msku = self.mapper.get_msku
+        self.processed_rows = [dict(row, msku=get_msku(row['sku'])) for row in self.sales_rows]
+        self.unmapped_rows = [row for row in self.processed_rows if row['msku'] is None]
+        self.unmapped_skus = list(dict.fromkeys(row['sku'] for row in self.unmapped_rows))
+        self.unmapped_locations = {}
+        for position, row in enumerate(self.processed_rows):
+            if row['msku'] is None and row['sku'] is not None:
+                self.unmapped_locations.setdefault(row['sku'], []).append(position)
+
+        mapped_count = len(self.processed_rows) - len(self.unmapped_rows)
+        return True, summarize_mapping(mapped_count, len(self.processed_rows), self.unmapped_skus)
+
+    def save_processed_data(self, filepath: str) -> tuple[bool, str]:
+        """
+        Saves the processed rows to a CSV file.
+
+        Args:
+            filepath: The path to save the new CSV file.
+
+        Returns:
+            A tuple (success, message).
+        """
+        if self.processed_rows is None:
+            return False, "Error: No processed data to save."
+
+        try:
+            with open(filepath, 'w', newline='', encoding='utf-8') as outfile:
+                writer = csv.DictWriter(outfile, fieldnames=PROCESSED_COLS, lineterminator='\n')
+                writer.writeheader()
+                writer.writerows(self.processed_rows)
+        except Exception as e:
+            return False, f"Error saving file: {e}"
+
+        # The CSV is saved at this point; failing to index it is reported
+        # as a warning rather than as a failed save.
+        message = f"Successfully saved processed data to: {filepath}"
+        try:
+            self.row_index.record(filepath, self.unmapped_locations)
+        except Exception as e:
+            print(f"Warning: could not update the unmapped row index for {filepath}: {e}")
+            message += f" Warning: could not update the unmapped row index: {e}"
+        try:
+            self.unmapped_tracker.update_rows(filepath, self.unmapped_rows, source=self.marketplace)
+        except Exception as e:
+            print(f"Warning: could not update the unmapped SKU aggregate for {filepath}: {e}")
+            message += f" Warning: could not update the unmapped SKU aggregate: {e}"
+        return True, message
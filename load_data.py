@@ -1,7 +1,13 @@
 import pandas as pd
 import requests
+import hashlib
 import json
 import os
+import sqlite3
+import sys
+import uuid
+from datetime import datetime, timezone
+from wms_storage import sqlite_connection
 
 # --- Configuration ---
 # To use this script, set the following environment variables:
@@ -16,78 +22,354 @@ HEADERS = {
     "Authorization": f"Bearer {API_TOKEN}",
 }
 
+# Sales records are sent in batches; the journal is checkpointed after each
+# committed batch so that an interrupted load can be resumed.
+LOAD_BATCH_SIZE = int(os.environ.get("WMS_LOAD_BATCH_SIZE", "100"))
+LOAD_JOURNAL_FILE = os.environ.get("WMS_LOAD_JOURNAL", "load_journal.db")
+DEAD_LETTER_FILE = os.environ.get("WMS_DEAD_LETTER_FILE", "load_dead_letter.jsonl")
+
+
+# 4xx responses that say nothing about the record itself: a bad or expired
+# token, missing permissions or a wrong base/table ID. They stop the whole
+# load like a network error instead of dead-lettering every row.
+FATAL_CLIENT_ERRORS = (401, 403, 404)
+RETRYABLE_CLIENT_ERRORS = (408, 429)
+
+
+class TeableRejectedError(Exception):
+    """Raised when Teable permanently rejects a record (a 4xx response)."""
+
+class TeablePayloadTooLargeError(TeableRejectedError):
+    """Raised when a request is too large (413); batches should be split."""
+
+def check_response(response):
+    """
+    Raises for a failed Teable response.
+
+    Raises:
+        TeablePayloadTooLargeError: If the request body was too large (413).
+        TeableRejectedError: If Teable rejects the record (any other 4xx not
+            listed in FATAL_CLIENT_ERRORS or RETRYABLE_CLIENT_ERRORS).
+        requests.exceptions.RequestException: On server errors, retryable client
+            errors and FATAL_CLIENT_ERRORS, all of which stop the load.
+    """
+    if response.status_code == 413:
+        raise TeablePayloadTooLargeError(response.text)
+    if (400 <= response.status_code < 500
+            and response.status_code not in FATAL_CLIENT_ERRORS + RETRYABLE_CLIENT_ERRORS):
+        raise TeableRejectedError(response.text)
+    response.raise_for_status()
+
 def find_record(table_id: str, query: str):
-    """Finds a record in a Teable table."""
+    """
+    Finds a record in a Teable table.
+
+    Raises:
+        TeableRejectedError, requests.exceptions.RequestException: See check_response.
+    """
     url = TEABLE_API_URL.format(baseId=BASE_ID, tableId=table_id)
     params = {'where': json.dumps(query)}
-    try:
-        response = requests.get(url, headers=HEADERS, params=params)
-        response.raise_for_status()
-        records = response.json().get('records', [])
-        if records:
-            return records[0]['id']
-    except requests.exceptions.RequestException as e:
-        print(f"  ERROR finding record in {table_id}: {e}")
+    response = requests.get(url, headers=HEADERS, params=params)
+    check_response(response)
+    records = response.json().get('records', [])
+    if records:
+        return records[0]['id']
     return None
 
 def create_record(table_id: str, payload: dict):
-    """Creates a record in a Teable table."""
+    """
+    Creates a record in a Teable table.
+
+    Raises:
+        TeableRejectedError, requests.exceptions.RequestException: See check_response.
+    """
     url = TEABLE_API_URL.format(baseId=BASE_ID, tableId=table_id)
-    try:
-        response = requests.post(url, headers=HEADERS, json=payload)
-        response.raise_for_status()
-        return response.json().get('id')
-    except requests.exceptions.RequestException as e:
-        print(f"  ERROR creating record in {table_id}: {e.response.text}")
-    return None
+    response = requests.post(url, headers=HEADERS, json=payload)
+    check_response(response)
+    return response.json().get('id')
+
+def create_records(table_id: str, records: list[dict]) -> list:
+    """
+    Creates a batch of records in a Teable table in a single request.
+
+    Raises:
+        TeableRejectedError, requests.exceptions.RequestException: See check_response.
+    """
+    url = TEABLE_API_URL.format(baseId=BASE_ID, tableId=table_id)
+    response = requests.post(url, headers=HEADERS, json={"records": records})
+    check_response(response)
+    return [record.get('id') for record in response.json().get('records', [])]
 
-def load_data_to_teable(processed_filepath: str):
+def upsert_records(processed_filepath: str, table_id: str, items: list[tuple[dict, dict]]):
+    """
+    Creates each (query, payload) record unless the query already finds one.
+    Rejected records are dead-lettered; network and server errors propagate
+    so the step is not journaled as done.
+    """
+    for query, payload in items:
+        try:
+            if not find_record(table_id, query):
+                create_record(table_id, payload)
+        except TeableRejectedError as e:
+            print(f"  ERROR upserting record in {table_id}: {e}")
+            write_dead_letter(processed_filepath, None, table_id, payload, str(e))
+
+# --- Load Journal ---
+
+def file_fingerprint(filepath: str) -> str:
+    """Returns a SHA-256 digest of the file contents."""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+JOURNAL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS load_journal (
+    file TEXT PRIMARY KEY,
+    entry TEXT NOT NULL
+);
+"""
+
+def read_journal_entry(processed_filepath: str) -> dict | None:
+    """Reads the journal entry for one processed file, or None if it has none."""
+    with sqlite_connection(LOAD_JOURNAL_FILE, JOURNAL_SCHEMA) as conn:
+        row = conn.execute('SELECT entry FROM load_journal WHERE file = ?',
+                           (os.path.abspath(processed_filepath),)).fetchone()
+    return json.loads(row['entry']) if row else None
+
+def write_journal_entry(processed_filepath: str, entry: dict):
+    """Checkpoints the journal entry for one processed file."""
+    with sqlite_connection(LOAD_JOURNAL_FILE, JOURNAL_SCHEMA, write=True) as conn:
+        conn.execute('INSERT OR REPLACE INTO load_journal (file, entry) VALUES (?, ?)',
+                     (os.path.abspath(processed_filepath), json.dumps(entry)))
+
+def new_journal_entry(fingerprint: str | None, status: str = 'in_progress') -> dict:
+    """Returns the journal entry of a load that has not sent anything yet."""
+    return {"fingerprint": fingerprint, "products_done": False, "skus_done": False,
+            "sales_offset": 0, "status": status}
+
+def rebase_journal_entry(processed_filepath: str, remapped_rows: list[int]):
+    """
+    Re-bases the journal entry of a processed file whose unmapped rows were
+    just patched in place by a new mapping. The patched rows are loaded on
+    their own from a remapped file, so a resumed load skips them and its
+    committed offset keeps counting only the rows that already had an MSKU.
+
+    A file that has not been loaded yet gets a 'not_started' entry, so that
+    its first load skips the patched rows as well.
+    """
+    path = os.path.abspath(processed_filepath)
+    with sqlite_connection(LOAD_JOURNAL_FILE, JOURNAL_SCHEMA, write=True) as conn:
+        row = conn.execute('SELECT entry FROM load_journal WHERE file = ?', (path,)).fetchone()
+        entry = json.loads(row['entry']) if row else new_journal_entry(None, status='not_started')
+        entry['fingerprint'] = file_fingerprint(processed_filepath)
+        entry['remapped_rows'] = sorted(set(entry.get('remapped_rows', [])) | set(remapped_rows))
+        conn.execute('INSERT OR REPLACE INTO load_journal (file, entry) VALUES (?, ?)', (path, json.dumps(entry)))
+
+def write_dead_letter(processed_filepath: str, row_index: int | None, table_id: str, payload: dict, error: str):
+    """
+    Appends a permanently rejected record to the dead-letter file.
+
+    Args:
+        row_index: The data-row position in the processed file, or None for
+            Products and SKUs records, which are derived from several rows.
+    """
+    entry = {
+        "file": os.path.abspath(processed_filepath),
+        "row": row_index,
+        "table": table_id,
+        "payload": payload,
+        "error": error,
+        "rejected_at": datetime.now(timezone.utc).isoformat(),
+    }
+    # A single append of one line, so concurrent loads do not interleave entries.
+    with open(DEAD_LETTER_FILE, 'a') as f:
+        f.write(json.dumps(entry) + "\n")
+
+def sales_payloads(df: pd.DataFrame) -> list[dict]:
+    """Builds the SalesData record payloads for every row of the DataFrame."""
+    columns = ['order_date', 'quantity', 'price', 'sku']
+    df = df.reindex(columns=columns).astype(object)
+    rows = df.where(pd.notna(df), None).to_dict('records')
+    return [{
+        "fields": {
+            "order_date": row['order_date'],
+            "quantity": row['quantity'],
+            "price": row['price'],
+            "sku_link": row['sku']
+        }
+    } for row in rows]
+
+def load_data_to_teable(processed_filepath: str, resume: bool = False) -> bool:
     """
     Loads processed sales data into the Teable database schema.
+
+    Progress is checkpointed in the load journal after every committed batch
+    of sales records. With resume=True, the load continues from the last
+    committed batch instead of starting over.
+
+    Returns:
+        True if the load finished (or there was nothing to load), False if it
+        was aborted.
     """
     if not os.path.exists(processed_filepath):
         print(f"Error: Processed file not found at {processed_filepath}")
-        return
+        return False
+
+    fingerprint = file_fingerprint(processed_filepath)
+    entry = read_journal_entry(processed_filepath)
+    if entry is not None and entry.get('fingerprint') != fingerprint:
+        if resume:
+            print("Error: The processed file has changed since the journaled load. Start a fresh load instead.")
+            return False
+        entry = None
+    if not resume or entry is None:
+        # Rows already patched by a remap are loaded from their remapped file,
+        # even when this file itself has never been loaded.
+        remapped_rows = entry.get('remapped_rows', []) if entry else []
+        entry = new_journal_entry(fingerprint)
+        if remapped_rows:
+            entry['remapped_rows'] = remapped_rows
+    elif entry.get('status') == 'complete':
+        print(f"Load for {processed_filepath} is already complete. Nothing to resume.")
+        return True
+    entry['status'] = 'in_progress'
 
     print(f"--- Starting Data Load for {processed_filepath} ---")
     df = pd.read_csv(processed_filepath)
     df.dropna(subset=['msku'], inplace=True)
+    # Rows patched by a mapping added since the file was saved are loaded separately.
+    df = df.drop(index=entry.get('remapped_rows', []), errors='ignore')
     if len(df) == 0:
-        print("No mappable data to load. Aborting.")
-        return
-
-    # 1. Upsert Products
-    print("\nStep 1: Upserting Products...")
-    unique_mskus = df['msku'].unique()
-    for msku in unique_mskus:
-        if not find_record('Products', {'msku': {'is': msku}}):
-            create_record('Products', {"fields": {"msku": msku, "product_name": msku.replace('-', ' ').title()}})
-
-    # 2. Upsert SKUs
-    print("\nStep 2: Upserting SKUs...")
-    unique_skus = df[['sku', 'msku']].drop_duplicates()
-    for _, row in unique_skus.iterrows():
-        sku, msku = row['sku'], row['msku']
-        if not find_record('SKUs', {'sku': {'is': sku}}):
-            create_record('SKUs', {"fields": {"sku": sku, "product_link": msku}})
-
-    # 3. Create Sales Records
-    print("\nStep 3: Creating Sales Records...")
-    for _, row in df.iterrows():
-        create_record('SalesData', {
-            "fields": {
-                "order_date": row.get('order_date'),
-                "quantity": row.get('quantity'),
-                "price": row.get('price'),
-                "sku_link": row.get('sku')
-            }
-        })
+        print("No mappable data to load. Skipping.")
+        return True
+
+    payloads = sales_payloads(df)
+    # Labels of the rows that survived dropna(), i.e. their data-row positions in the file.
+    row_labels = df.index.tolist()
+    total = len(payloads)
+    try:
+        write_journal_entry(processed_filepath, entry)
+
+        # 1. Upsert Products
+        if not entry['products_done']:
+            print("\nStep 1: Upserting Products...")
+            upsert_records(processed_filepath, 'Products', [
+                ({'msku': {'is': msku}}, {"fields": {"msku": msku, "product_name": msku.replace('-', ' ').title()}})
+                for msku in df['msku'].unique().tolist()
+            ])
+            entry['products_done'] = True
+            write_journal_entry(processed_filepath, entry)
+
+        # 2. Upsert SKUs
+        if not entry['skus_done']:
+            print("\nStep 2: Upserting SKUs...")
+            unique_skus = df[['sku', 'msku']].drop_duplicates()
+            upsert_records(processed_filepath, 'SKUs', [
+                ({'sku': {'is': sku}}, {"fields": {"sku": sku, "product_link": msku}})
+                for sku, msku in zip(unique_skus['sku'].tolist(), unique_skus['msku'].tolist())
+            ])
+            entry['skus_done'] = True
+            write_journal_entry(processed_filepath, entry)
+
+        # 3. Create Sales Records
+        print(f"\nStep 3: Creating Sales Records (from row {entry['sales_offset']} of {total})...")
+        batch_size = LOAD_BATCH_SIZE
+        while entry['sales_offset'] < total:
+            start = entry['sales_offset']
+            batch = payloads[start:start + batch_size]
+            try:
+                create_records('SalesData', batch)
+                entry['sales_offset'] = start + len(batch)
+            except TeablePayloadTooLargeError as e:
+                if len(batch) > 1:
+                    # Retry the same rows in smaller batches for the rest of this load.
+                    batch_size = max(1, len(batch) // 2)
+                    continue
+                print(f"  ERROR creating record in SalesData (row {row_labels[start]}): {e}")
+                write_dead_letter(processed_filepath, row_labels[start], 'SalesData', batch[0], str(e))
+                entry['sales_offset'] = start + 1
+            except TeableRejectedError:
+                # Send the rejected batch row by row so only the bad rows are dead-lettered.
+                for i, payload in enumerate(batch):
+                    try:
+                        create_records('SalesData', [payload])
+                    except TeableRejectedError as e:
+                        print(f"  ERROR creating record in SalesData (row {row_labels[start + i]}): {e}")
+                        write_dead_letter(processed_filepath, row_labels[start + i], 'SalesData', payload, str(e))
+                    entry['sales_offset'] = start + i + 1
+                    write_journal_entry(processed_filepath, entry)
+            write_journal_entry(processed_filepath, entry)
+    except requests.exceptions.RequestException as e:
+        print(f"  ERROR loading data into Teable: {e}")
+        print(f"\n--- Data Load Interrupted at sales row {entry['sales_offset']} of {total} ---")
+        print(f"Run 'python load_data.py resume {processed_filepath}' to continue.")
+        return False
+    except (sqlite3.Error, OSError) as e:
+        print(f"  ERROR writing the load journal: {e}")
+        print(f"\n--- Data Load Interrupted at sales row {entry['sales_offset']} of {total} ---")
+        print("The last batch may not be journaled; check SalesData before resuming.")
+        return False
+
+    try:
+        entry['status'] = 'complete'
+        write_journal_entry(processed_filepath, entry)
+    except (sqlite3.Error, OSError) as e:
+        print(f"  ERROR writing the load journal: {e}")
     print("\n--- Data Load Finished ---")
+    return True
+
+def resume_load(processed_filepath: str) -> bool:
+    """Resumes an interrupted load from its last committed batch."""
+    return load_data_to_teable(processed_filepath, resume=True)
+
+def replay_dead_letters() -> tuple[int, int]:
+    """
+    Re-sends every record in the dead-letter file. Records that are still
+    rejected, or that could not be sent, are kept for a later replay.
+
+    Returns:
+        A tuple (replayed, remaining).
+    """
+    if not os.path.exists(DEAD_LETTER_FILE):
+        return 0, 0
+
+    # Claim the current entries by renaming the file, so that loads running
+    # at the same time keep appending to a fresh dead-letter file.
+    claimed_path = f"{DEAD_LETTER_FILE}.{uuid.uuid4().hex}.replaying"
+    try:
+        os.replace(DEAD_LETTER_FILE, claimed_path)
+    except FileNotFoundError:
+        return 0, 0
+    with open(claimed_path, 'r') as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+
+    remaining = []
+    for entry in entries:
+        try:
+            create_records(entry['table'], [entry['payload']])
+        except (TeableRejectedError, requests.exceptions.RequestException) as e:
+            entry['error'] = str(e)
+            remaining.append(entry)
+
+    with open(DEAD_LETTER_FILE, 'a') as f:
+        for entry in remaining:
+            f.write(json.dumps(entry) + "\n")
+    os.remove(claimed_path)
+    return len(entries) - len(remaining), len(remaining)
 
 
 if __name__ == '__main__':
     if API_TOKEN == "YOUR_TEABLE_API_TOKEN" or BASE_ID == "YOUR_TEABLE_BASE_ID":
         print("ERROR: Please set the TEABLE_API_TOKEN and TEABLE_BASE_ID environment variables.")
+    elif len(sys.argv) == 3 and sys.argv[1] == 'resume':
+        resume_load(sys.argv[2])
+    elif len(sys.argv) == 2 and sys.argv[1] == 'replay':
+        replayed, remaining = replay_dead_letters()
+        print(f"Replayed {replayed} dead-lettered records; {remaining} remain in {DEAD_LETTER_FILE}.")
+    elif len(sys.argv) == 2:
+        load_data_to_teable(sys.argv[1])
     else:
         dummy_data = {
             'order_id': [1001, 1002, 1004],
@@ -1,4 +1,10 @@
-import pandas as pd
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+# pandas is imported where it is used so that the column definitions and
+# detect_format() stay cheap to import for the stdlib fast path.
+if TYPE_CHECKING:
+    import pandas as pd
 
 # Define the expected columns for each marketplace to help with detection
 AMAZON_COLS = {'FNSKU', 'Event Type', 'Reference ID'}
@@ -7,6 +13,29 @@ MEESHO_COLS = {'Sub Order No', 'Packet Id', 'Supplier Listed Price (Incl. GST +
 
 STANDARDIZED_COLS = ['order_date', 'sku', 'quantity']
 
+# Marketplace column names renamed to the standardized ones
+# The 'MSKU' column from Amazon seems to be the SKU we need to map
+COLUMN_RENAMES = {
+    'amazon': {'Date': 'order_date', 'MSKU': 'sku', 'Quantity': 'quantity'},
+    'flipkart': {'Ordered On': 'order_date', 'SKU': 'sku', 'Quantity': 'quantity'},
+    'meesho': {'Order Date': 'order_date', 'SKU': 'sku', 'Quantity': 'quantity'},
+}
+
+# How many unmapped SKUs to name in the processing summary; the full,
+# ranked list is kept by the UnmappedSKUTracker.
+UNMAPPED_SUMMARY_LIMIT = 10
+
+def summarize_mapping(mapped_count: int, total_count: int, unmapped_skus) -> str:
+    """Builds the summary message reported after mapping a sales file."""
+    message = f"Processing complete. Mapped {mapped_count} of {total_count} records."
+    if len(unmapped_skus) > 0:
+        shown = ', '.join(map(str, unmapped_skus[:UNMAPPED_SUMMARY_LIMIT]))
+        more = len(unmapped_skus) - UNMAPPED_SUMMARY_LIMIT
+        message += f"\nFound {len(unmapped_skus)} unmapped SKUs: {shown}"
+        if more > 0:
+            message += f" and {more} more (see the unmapped SKUs page)"
+    return message
+
 def detect_format(columns: set) -> str | None:
     """Detects the marketplace format based on the given column headers."""
     if AMAZON_COLS.issubset(columns):
@@ -19,39 +48,43 @@ def detect_format(columns: set) -> str | None:
 
 def parse_amazon(df: pd.DataFrame) -> pd.DataFrame:
     """Parses an Amazon sales DataFrame into the standardized format."""
-    # The 'MSKU' column from Amazon seems to be the SKU we need to map
-    df_renamed = df.rename(columns={'Date': 'order_date', 'MSKU': 'sku', 'Quantity': 'quantity'})
+    df_renamed = df.rename(columns=COLUMN_RENAMES['amazon'])
     return df_renamed[STANDARDIZED_COLS]
 
 def parse_flipkart(df: pd.DataFrame) -> pd.DataFrame:
     """Parses a Flipkart sales DataFrame into the standardized format."""
-    df_renamed = df.rename(columns={'Ordered On': 'order_date', 'SKU': 'sku', 'Quantity': 'quantity'})
+    df_renamed = df.rename(columns=COLUMN_RENAMES['flipkart'])
     return df_renamed[STANDARDIZED_COLS]
 
 def parse_meesho(df: pd.DataFrame) -> pd.DataFrame:
     """Parses a Meesho sales DataFrame into the standardized format."""
-    df_renamed = df.rename(columns={'Order Date': 'order_date', 'SKU': 'sku', 'Quantity': 'quantity'})
+    df_renamed = df.rename(columns=COLUMN_RENAMES['meesho'])
     return df_renamed[STANDARDIZED_COLS]
 
 def process_sales_file(filepath: str) -> pd.DataFrame | None:
     """
     Detects the format of a sales file, parses it, and returns a
-    standardized DataFrame.
+    standardized DataFrame. The detected marketplace is recorded in
+    the DataFrame's attrs under 'marketplace'.
     """
+    import pandas as pd
+
     try:
         df = pd.read_csv(filepath)
         columns = set(df.columns)
         file_format = detect_format(columns)
 
         if file_format == 'amazon':
-            return parse_amazon(df)
+            standardized_df = parse_amazon(df)
         elif file_format == 'flipkart':
-            return parse_flipkart(df)
+            standardized_df = parse_flipkart(df)
         elif file_format == 'meesho':
-            return parse_meesho(df)
+            standardized_df = parse_meesho(df)
         else:
             print(f"Error: Could not determine file format for {filepath}")
             return None
+        standardized_df.attrs['marketplace'] = file_format
+        return standardized_df
     except Exception as e:
         print(f"An error occurred while processing {filepath}: {e}")
         return None
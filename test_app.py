@@ -0,0 +1,29 @@
+import unittest
+import os
+import shutil
+import tempfile
+import app
+
+class TestAddMappingRedirect(unittest.TestCase):
+
+    def setUp(self):
+        """Run the app in a temporary directory with a copy of the mapping file."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        shutil.copy('wms_mapping.csv', self.tmpdir.name)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.tmpdir.name)
+        self.client = app.app.test_client()
+
+    def test_next_only_returns_to_the_unmapped_page(self):
+        """The 'next' field cannot redirect to another site."""
+        for next_url, expected in (('/unmapped?page=2', '/unmapped?page=2'),
+                                   ('/\\evil.com', '/mappings'),
+                                   ('//evil.com', '/mappings'),
+                                   ('https://evil.com/unmapped', '/mappings')):
+            response = self.client.post('/add_mapping', data={'sku': 'gel-pen', 'msku': 'cste-pen', 'next': next_url})
+            self.assertEqual(response.status_code, 302)
+            self.assertEqual(response.location, expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from fast_wms_logic import FastWMSLogic
+from wms_logic import WMSLogic
+from unmapped_sku_tracker import UnmappedSKUTracker
+
+class TestFastWMSLogic(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a temporary directory for the processed files."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def test_matches_pandas_output(self):
+        """The stdlib fast path writes the same processed file as WMSLogic."""
+        # Blank and 'NA' cells make pandas read the Quantity column as float.
+        with open('dummy_fk_sales.csv') as f:
+            header, row = f.read().splitlines()
+        blanks_file = os.path.join(self.tmpdir.name, 'blank_fk_sales.csv')
+        with open(blanks_file, 'w') as f:
+            f.write('\n'.join([header, row, row.replace(',10,', ',,'), row.replace(',10,', ',2.50,'),
+                               row.replace('pen-blue', 'NA')]) + '\n')
+
+        for dummy_input_file in ('dummy_amazon_sales.csv', 'dummy_fk_sales.csv', 'dummy_meesho_sales.csv', blanks_file):
+            outputs = []
+            for logic in (FastWMSLogic(), WMSLogic()):
+                output_file = os.path.join(self.tmpdir.name,
+                                           f"{type(logic).__name__}_{os.path.basename(dummy_input_file)}")
+                for step in (lambda: logic.load_and_process_sales_data(dummy_input_file), logic.process_data,
+                             lambda: logic.save_processed_data(output_file)):
+                    success, message = step()
+                    self.assertTrue(success, message)
+                with open(output_file) as f:
+                    outputs.append(f.read())
+            self.assertEqual(outputs[0], outputs[1], f"Output mismatch for {dummy_input_file}")
+
+    def test_cli_does_not_import_pandas(self):
+        """The command-line tool maps and saves small files without importing pandas."""
+        repo_dir = os.path.dirname(os.path.abspath(__file__))
+        shutil.copy(os.path.join(repo_dir, 'wms_mapping.csv'), self.tmpdir.name)
+        with open(os.path.join(repo_dir, 'dummy_fk_sales.csv')) as f:
+            unmapped_sales = f.read().replace('pen-blue', 'gel-pen')
+        with open(os.path.join(self.tmpdir.name, 'unmapped_fk_sales.csv'), 'w') as f:
+            f.write(unmapped_sales)
+        shutil.copy(os.path.join(repo_dir, 'dummy_fk_sales.csv'), self.tmpdir.name)
+
+        for command, filename, expected in (('map', 'dummy_fk_sales.csv', "Mapped 1 of 1 records."),
+                                            ('save', 'unmapped_fk_sales.csv', "Found 1 unmapped SKUs: gel-pen")):
+            code = (f"import sys, wms; wms.main(['{command}', '{filename}']); "
+                    "print('pandas' in sys.modules)")
+            result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                                    cwd=self.tmpdir.name, env=dict(os.environ, PYTHONPATH=repo_dir))
+            self.assertIn(expected, result.stdout)
+            self.assertEqual(result.stdout.strip().splitlines()[-1], 'False')
+
+        rows, _ = UnmappedSKUTracker(os.path.join(self.tmpdir.name, 'unmapped_skus.db')).top()
+        self.assertEqual([row['sku'] for row in rows], ['gel-pen'])
+
+    def test_cli_save_skips_its_own_outputs(self):
+        """Re-running save over the same folder skips the processed files it wrote."""
+        repo_dir = os.path.dirname(os.path.abspath(__file__))
+        shutil.copy(os.path.join(repo_dir, 'wms_mapping.csv'), self.tmpdir.name)
+        os.mkdir(os.path.join(self.tmpdir.name, 'uploads'))
+        shutil.copy(os.path.join(repo_dir, 'dummy_fk_sales.csv'), os.path.join(self.tmpdir.name, 'uploads'))
+
+        for _ in range(2):
+            result = subprocess.run([sys.executable, os.path.join(repo_dir, 'wms.py'), 'save', 'uploads/*.csv'],
+                                    capture_output=True, text=True, cwd=self.tmpdir.name)
+            self.assertEqual(result.returncode, 0, result.stdout)
+        self.assertIn("Skipping uploads/processed_dummy_fk_sales.csv", result.stdout)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.tmpdir.name, 'uploads'))),
+                         ['dummy_fk_sales.csv', 'processed_dummy_fk_sales.csv'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,216 @@
+import unittest
+import json
+import os
+import tempfile
+import threading
+from unittest import mock
+import pandas as pd
+import requests
+import load_data
+from unmapped_row_index import UnmappedRowIndex
+
+REAL_FIND_RECORD = load_data.find_record
+
+class FakeResponse:
+    """A minimal stand-in for requests.Response."""
+    def __init__(self, status_code, records=None, text=''):
+        self.status_code = status_code
+        self.text = text
+        self._records = records or []
+
+    def json(self):
+        return {'records': self._records}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(self.text)
+
+class TestLoadJournal(unittest.TestCase):
+
+    def setUp(self):
+        """Point the journal and dead-letter file at a temporary directory."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.processed_file = os.path.join(self.tmpdir.name, 'processed_sales.csv')
+        pd.DataFrame({
+            'order_date': ['2025-08-01'] * 5,
+            'sku': ['pen', 'pen', 'bad', 'pen', 'pen'],
+            'quantity': [1, 2, 3, 4, 5],
+            'msku': ['cste-pen'] * 5,
+        }).to_csv(self.processed_file, index=False)
+
+        patches = [
+            mock.patch.object(load_data, 'LOAD_BATCH_SIZE', 2),
+            mock.patch.object(load_data, 'LOAD_JOURNAL_FILE', os.path.join(self.tmpdir.name, 'journal.db')),
+            mock.patch.object(load_data, 'DEAD_LETTER_FILE', os.path.join(self.tmpdir.name, 'dead.jsonl')),
+            mock.patch.object(load_data, 'find_record', return_value='rec1'),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.addCleanup(self.tmpdir.cleanup)
+        self.sent = []
+
+    def fake_post(self, fail_after=None):
+        """Builds a fake requests.post that rejects the 'bad' SKU and can simulate an outage."""
+        def post(url, headers=None, json=None):
+            records = json['records']
+            if fail_after is not None and len(self.sent) >= fail_after:
+                raise requests.exceptions.ConnectionError("network down")
+            if any(r['fields']['sku_link'] == 'bad' for r in records):
+                return FakeResponse(422, text='invalid sku_link')
+            self.sent.extend(r['fields']['quantity'] for r in records)
+            return FakeResponse(200, records=[{'id': 'x'} for _ in records])
+        return post
+
+    def test_resume_continues_from_last_committed_batch(self):
+        """An interrupted load resumes without re-sending committed rows."""
+        with mock.patch.object(load_data.requests, 'post', side_effect=self.fake_post(fail_after=2)):
+            self.assertFalse(load_data.load_data_to_teable(self.processed_file))
+        self.assertEqual(self.sent, [1, 2])
+
+        with mock.patch.object(load_data.requests, 'post', side_effect=self.fake_post()):
+            self.assertTrue(load_data.resume_load(self.processed_file))
+        self.assertEqual(self.sent, [1, 2, 4, 5])
+
+        journal = load_data.read_journal_entry(self.processed_file)
+        self.assertEqual(journal['sales_offset'], 5)
+        self.assertEqual(journal['status'], 'complete')
+
+    def test_rejected_rows_are_dead_lettered_and_replayed(self):
+        """Permanently rejected rows go to the dead-letter file and can be replayed."""
+        with mock.patch.object(load_data.requests, 'post', side_effect=self.fake_post()):
+            self.assertTrue(load_data.load_data_to_teable(self.processed_file))
+        self.assertEqual(self.sent, [1, 2, 4, 5])
+
+        with open(load_data.DEAD_LETTER_FILE) as f:
+            dead = [json.loads(line) for line in f]
+        self.assertEqual(len(dead), 1)
+        self.assertEqual(dead[0]['row'], 2)
+        self.assertEqual(dead[0]['error'], 'invalid sku_link')
+
+        with mock.patch.object(load_data.requests, 'post', return_value=FakeResponse(200, records=[{'id': 'x'}])):
+            self.assertEqual(load_data.replay_dead_letters(), (1, 0))
+
+    def test_network_error_in_upserts_aborts_without_marking_step_done(self):
+        """A network error while upserting products aborts the load so it can be resumed."""
+        with mock.patch.object(load_data, 'find_record', side_effect=requests.exceptions.ConnectionError("network down")):
+            self.assertFalse(load_data.load_data_to_teable(self.processed_file))
+        journal = load_data.read_journal_entry(self.processed_file)
+        self.assertFalse(journal['products_done'])
+
+        with mock.patch.object(load_data.requests, 'post', side_effect=self.fake_post()):
+            self.assertTrue(load_data.resume_load(self.processed_file))
+
+    def test_rejected_upserts_are_dead_lettered(self):
+        """A product Teable rejects is dead-lettered and the load carries on."""
+        with mock.patch.object(load_data, 'find_record', return_value=None), \
+             mock.patch.object(load_data.requests, 'post', side_effect=[FakeResponse(422, text='bad product')]
+                               + [FakeResponse(200, records=[{'id': 'x'}])] * 10):
+            self.assertTrue(load_data.load_data_to_teable(self.processed_file))
+
+        with open(load_data.DEAD_LETTER_FILE) as f:
+            dead = [json.loads(line) for line in f]
+        self.assertEqual([(d['table'], d['row']) for d in dead], [('Products', None)])
+
+    def test_dead_letter_row_is_the_file_row(self):
+        """The dead-letter row counts unmapped rows that were skipped before it."""
+        df = pd.read_csv(self.processed_file)
+        df.loc[0, 'msku'] = None
+        df.to_csv(self.processed_file, index=False)
+
+        with mock.patch.object(load_data.requests, 'post', side_effect=self.fake_post()):
+            self.assertTrue(load_data.load_data_to_teable(self.processed_file))
+
+        with open(load_data.DEAD_LETTER_FILE) as f:
+            dead = [json.loads(line) for line in f]
+        self.assertEqual(dead[0]['row'], 2)
+
+    def test_no_mappable_data_is_not_a_failure(self):
+        """A file with no mapped rows has nothing to load, which is not an error."""
+        df = pd.read_csv(self.processed_file)
+        df['msku'] = None
+        df.to_csv(self.processed_file, index=False)
+        self.assertTrue(load_data.load_data_to_teable(self.processed_file))
+
+    def test_remap_during_interrupted_load_keeps_it_resumable(self):
+        """A mapping added mid-load patches the file without breaking resume or duplicating rows."""
+        df = pd.read_csv(self.processed_file)
+        df.loc[1, ['sku', 'msku']] = ['zzz', None]
+        df.loc[2, 'sku'] = 'pen'
+        df.to_csv(self.processed_file, index=False)
+        index = UnmappedRowIndex(os.path.join(self.tmpdir.name, 'unmapped_rows.db'))
+        index.record(self.processed_file, {'zzz': [1]})
+
+        with mock.patch.object(load_data.requests, 'post', side_effect=self.fake_post(fail_after=2)):
+            self.assertFalse(load_data.load_data_to_teable(self.processed_file))
+        self.assertEqual(self.sent, [1, 3])
+
+        remapped_files = index.remap({'zzz': 'cste-zzz'})
+        with mock.patch.object(load_data.requests, 'post', side_effect=self.fake_post()):
+            self.assertTrue(load_data.resume_load(self.processed_file))
+            self.assertEqual(self.sent, [1, 3, 4, 5])
+            self.assertTrue(load_data.load_data_to_teable(remapped_files[0]))
+        self.assertEqual(self.sent, [1, 3, 4, 5, 2])
+
+    def test_remap_before_first_load_does_not_duplicate_rows(self):
+        """Rows remapped before a file is ever loaded are sent once, from the remapped file."""
+        df = pd.read_csv(self.processed_file)
+        df.loc[1, ['sku', 'msku']] = ['zzz', None]
+        df.loc[2, 'sku'] = 'pen'
+        df.to_csv(self.processed_file, index=False)
+        index = UnmappedRowIndex(os.path.join(self.tmpdir.name, 'unmapped_rows.db'))
+        index.record(self.processed_file, {'zzz': [1]})
+
+        remapped_files = index.remap({'zzz': 'cste-zzz'})
+        self.assertEqual(load_data.read_journal_entry(self.processed_file)['status'], 'not_started')
+        with mock.patch.object(load_data.requests, 'post', side_effect=self.fake_post()):
+            self.assertTrue(load_data.load_data_to_teable(remapped_files[0]))
+            self.assertTrue(load_data.load_data_to_teable(self.processed_file))
+        self.assertEqual(self.sent, [2, 1, 3, 4, 5])
+
+    def test_concurrent_journal_writes_are_not_lost(self):
+        """Loads checkpointing from several threads at once keep every entry."""
+        errors = []
+        def checkpoint(n):
+            try:
+                for offset in range(20):
+                    load_data.write_journal_entry(f"file_{n}.csv", {'sales_offset': offset})
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=checkpoint, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        for n in range(8):
+            self.assertEqual(load_data.read_journal_entry(f"file_{n}.csv"), {'sales_offset': 19})
+
+    def test_unauthorized_stops_the_load(self):
+        """A 401 stops the load for a later resume instead of dead-lettering every row."""
+        unauthorized = FakeResponse(401, text='Unauthorized')
+        with mock.patch.object(load_data, 'find_record', new=REAL_FIND_RECORD), \
+             mock.patch.object(load_data.requests, 'get', return_value=unauthorized), \
+             mock.patch.object(load_data.requests, 'post', return_value=unauthorized):
+            self.assertFalse(load_data.load_data_to_teable(self.processed_file))
+
+        journal = load_data.read_journal_entry(self.processed_file)
+        self.assertEqual((journal['status'], journal['sales_offset']), ('in_progress', 0))
+        self.assertFalse(os.path.exists(load_data.DEAD_LETTER_FILE))
+
+    def test_payload_too_large_splits_the_batch(self):
+        """A 413 retries the rows in smaller batches instead of rejecting them."""
+        def post(url, headers=None, json=None):
+            if len(json['records']) > 1:
+                return FakeResponse(413, text='Payload Too Large')
+            self.sent.extend(r['fields']['quantity'] for r in json['records'])
+            return FakeResponse(200, records=[{'id': 'x'}])
+
+        with mock.patch.object(load_data.requests, 'post', side_effect=post):
+            self.assertTrue(load_data.load_data_to_teable(self.processed_file))
+        self.assertEqual(self.sent, [1, 2, 3, 4, 5])
+        self.assertFalse(os.path.exists(load_data.DEAD_LETTER_FILE))
+
+if __name__ == '__main__':
+    unittest.main()
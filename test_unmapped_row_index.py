@@ -0,0 +1,88 @@
+import unittest
+import os
+import tempfile
+import threading
+from unittest import mock
+import pandas as pd
+import wms_logic
+from unmapped_row_index import UnmappedRowIndex
+
+class TestUnmappedRowIndex(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a row index and a processed file in a temporary directory."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.index = UnmappedRowIndex(os.path.join(self.tmpdir.name, 'unmapped_rows.db'))
+        self.processed_file = os.path.join(self.tmpdir.name, 'processed_sales.csv')
+
+        patches = [
+            mock.patch.object(wms_logic, 'UnmappedRowIndex', return_value=self.index),
+            mock.patch.object(wms_logic, 'UnmappedSKUTracker'),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        self.logic = wms_logic.WMSLogic()
+        self.logic.sales_df = pd.DataFrame({
+            'order_date': ['2025-08-01'] * 4,
+            'sku': ['pen', 'marker', 'pencil', 'marker'],
+            'quantity': [1, 2, 3, 4],
+        })
+
+    def test_process_and_save_records_unmapped_locations(self):
+        """Saving a processed file indexes the positions of its unmapped rows."""
+        self.logic.process_data()
+        self.logic.save_processed_data(self.processed_file)
+        self.assertEqual(self.index.locations('marker'), {os.path.abspath(self.processed_file): [1, 3]})
+
+        # Re-saving over the same path replaces the old entries.
+        self.logic.sales_df = self.logic.sales_df.iloc[:1]
+        self.logic.process_data()
+        self.logic.save_processed_data(self.processed_file)
+        self.assertEqual(self.index.locations('marker'), {})
+
+    def test_remap_patches_only_affected_rows(self):
+        """Adding a mapping fills in the indexed rows and writes them to a remapped file."""
+        self.logic.process_data()
+        self.logic.save_processed_data(self.processed_file)
+        with open(self.processed_file) as f:
+            original_lines = f.read().splitlines()
+
+        remapped_files = self.index.remap({'marker': 'cste-marker'})
+        self.assertEqual(len(remapped_files), 1)
+
+        with open(self.processed_file) as f:
+            patched_lines = f.read().splitlines()
+        self.assertEqual(patched_lines[1:4:2], original_lines[1:4:2])
+        self.assertEqual(patched_lines[2], '2025-08-01,marker,2,cste-marker')
+        self.assertEqual(patched_lines[4], '2025-08-01,marker,4,cste-marker')
+
+        remapped_df = pd.read_csv(remapped_files[0])
+        self.assertEqual(remapped_df['quantity'].tolist(), [2, 4])
+        self.assertEqual(self.index.locations('marker'), {})
+
+    def test_index_failure_does_not_fail_the_save(self):
+        """A failed index update is reported as a warning, not as a failed save."""
+        self.logic.process_data()
+        with mock.patch.object(self.index, 'record', side_effect=OSError("disk full")):
+            success, message = self.logic.save_processed_data(self.processed_file)
+        self.assertTrue(success)
+        self.assertIn("could not update the unmapped row index: disk full", message)
+        self.assertTrue(os.path.exists(self.processed_file))
+
+    def test_concurrent_records_are_not_lost(self):
+        """Files saved from several threads at once all stay indexed."""
+        def save(n):
+            self.index.record(f"processed_{n}.csv", {'marker': [n]})
+
+        threads = [threading.Thread(target=save, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(self.index.locations('marker').values()), [[n] for n in range(8)])
+
+if __name__ == '__main__':
+    unittest.main()
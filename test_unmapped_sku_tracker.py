@@ -0,0 +1,50 @@
+import unittest
+import os
+import tempfile
+import pandas as pd
+from unmapped_sku_tracker import UnmappedSKUTracker
+
+class TestUnmappedSKUTracker(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a tracker backed by a temporary aggregate file."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.tracker = UnmappedSKUTracker(os.path.join(self.tmpdir.name, 'unmapped_skus.db'))
+
+    def test_aggregates_across_uploads_and_ranks_by_units(self):
+        """Counts, units and sources accumulate across uploads and rank by impact."""
+        self.tracker.update('processed_fk.csv', pd.DataFrame({'sku': ['a', 'a', 'b'], 'quantity': [1, 2, 10]}), source='flipkart')
+        self.tracker.update('processed_amz.csv', pd.DataFrame({'sku': ['a', 'c'], 'quantity': [4, 1]}), source='amazon')
+
+        rows, total = self.tracker.top(limit=2)
+        self.assertEqual(total, 3)
+        self.assertEqual([r['sku'] for r in rows], ['b', 'a'])
+        self.assertEqual(rows[1]['occurrences'], 3)
+        self.assertEqual(rows[1]['units'], 7)
+        self.assertEqual(rows[1]['source'], 'amazon,flipkart')
+
+        rows, _ = self.tracker.top(limit=2, offset=2)
+        self.assertEqual([r['sku'] for r in rows], ['c'])
+
+    def test_saving_the_same_file_again_replaces_its_counts(self):
+        """Re-processing a file does not count its rows twice."""
+        unmapped_df = pd.DataFrame({'sku': ['a'], 'quantity': [10]})
+        self.tracker.update('processed_fk.csv', unmapped_df, source='flipkart')
+        self.tracker.update('processed_fk.csv', unmapped_df, source='flipkart')
+        rows, _ = self.tracker.top()
+        self.assertEqual((rows[0]['occurrences'], rows[0]['units']), (1, 10))
+
+        self.tracker.update('processed_fk.csv', unmapped_df.iloc[:0], source='flipkart')
+        self.assertEqual(self.tracker.top(), ([], 0))
+
+    def test_remove_drops_newly_mapped_skus(self):
+        """SKUs are dropped from the aggregate once they are mapped."""
+        self.tracker.update('processed_meesho.csv', pd.DataFrame({'sku': ['a', 'b'], 'quantity': [1, 1]}), source='meesho')
+        self.tracker.remove(['a'])
+        rows, total = self.tracker.top()
+        self.assertEqual(total, 1)
+        self.assertEqual(rows[0]['sku'], 'b')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import csv
+import os
+from datetime import datetime
+from wms_storage import replace_file, sqlite_connection
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS unmapped_rows (
+    sku TEXT NOT NULL,
+    file TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (sku, file, position)
+);
+CREATE INDEX IF NOT EXISTS unmapped_rows_by_file ON unmapped_rows (file);
+"""
+
+class UnmappedRowIndex:
+    """
+    Keeps a persistent inverted index from unmapped SKU to the processed
+    files and row positions where it occurs, so that adding a mapping only
+    patches the rows it affects instead of reprocessing every upload.
+
+    The index is a SQLite table keyed by SKU, so recording a file or
+    re-mapping a SKU only reads and writes the rows involved.
+    """
+    def __init__(self, index_filepath: str):
+        """
+        Initializes the index with the path of its database.
+
+        Args:
+            index_filepath: The path to the unmapped row index SQLite database.
+        """
+        self.index_filepath = index_filepath
+
+    def locations(self, sku: str) -> dict[str, list[int]]:
+        """Returns the indexed row positions of one SKU, by processed file path."""
+        if not os.path.exists(self.index_filepath):
+            return {}
+        with sqlite_connection(self.index_filepath, INDEX_SCHEMA) as conn:
+            return self._locations(conn, sku)
+
+    def record(self, processed_filepath: str, locations: dict[str, list[int]]):
+        """
+        Records the unmapped rows of a processed file, replacing any entries
+        left from an earlier file saved at the same path.
+
+        Args:
+            processed_filepath: The path the processed file was saved to.
+            locations: The row positions of each unmapped SKU in that file.
+        """
+        if not locations and not os.path.exists(self.index_filepath):
+            return
+
+        path = os.path.abspath(processed_filepath)
+        with sqlite_connection(self.index_filepath, INDEX_SCHEMA, write=True) as conn:
+            conn.execute('DELETE FROM unmapped_rows WHERE file = ?', (path,))
+            conn.executemany('INSERT OR IGNORE INTO unmapped_rows (sku, file, position) VALUES (?, ?, ?)',
+                             [(str(sku), path, int(row)) for sku, rows in locations.items() for row in rows])
+
+    def remap(self, mappings: dict[str, str]) -> list[str]:
+        """
+        Fills in the MSKU of every indexed row whose SKU has just been mapped.
+
+        Only the processed files that contain those SKUs are touched. For each
+        of them, the patched rows are also written to a separate
+        'remapped_<timestamp>_<name>' file so they can be pushed downstream
+        on their own, and the file's load journal entry is re-based so that
+        a later load of it does not send them twice.
+
+        The index stays locked while the files are patched, so a concurrent
+        save or remap of the same files waits for this one to finish.
+
+        Args:
+            mappings: The newly added SKU to MSKU mappings.
+
+        Returns:
+            The paths of the files holding the patched rows.
+        """
+        if not os.path.exists(self.index_filepath):
+            return []
+
+        remapped_filepaths = []
+        with sqlite_connection(self.index_filepath, INDEX_SCHEMA, write=True) as conn:
+            patches = {}
+            for sku in mappings:
+                for path, rows in self._locations(conn, sku).items():
+                    patches.setdefault(path, {}).update({row: sku for row in rows})
+            if not patches:
+                return []
+
+            timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
+            for path, row_skus in patches.items():
+                remapped_filepath = self._patch_file(path, row_skus, mappings, timestamp)
+                if remapped_filepath:
+                    remapped_filepaths.append(remapped_filepath)
+            conn.executemany('DELETE FROM unmapped_rows WHERE sku = ?', [(sku,) for sku in mappings])
+        return remapped_filepaths
+
+    def _patch_file(self, path: str, row_skus: dict[int, str], mappings: dict[str, str], timestamp: str) -> str | None:
+        """
+        Patches the given rows of one processed file and writes them to a
+        remapped file, returning its path, or None if nothing was patched.
+        """
+        if not os.path.exists(path):
+            return None
+        with open(path, newline='') as infile:
+            reader = csv.reader(infile)
+            header = next(reader)
+            rows = list(reader)
+        sku_col, msku_col = header.index('sku'), header.index('msku')
+
+        patched_positions = []
+        for position, sku in sorted(row_skus.items()):
+            # Skip stale positions, e.g. if the file was overwritten since it was indexed.
+            if position < len(rows) and rows[position][sku_col] == sku and not rows[position][msku_col]:
+                rows[position][msku_col] = mappings[sku]
+                patched_positions.append(position)
+        if not patched_positions:
+            return None
+
+        self._write_csv(path, header, rows)
+        # Keep later loads of this file from re-sending the patched rows;
+        # imported here so the stdlib fast path does not pull in pandas and requests.
+        from load_data import rebase_journal_entry
+        rebase_journal_entry(path, patched_positions)
+        remapped_filepath = os.path.join(os.path.dirname(path), f"remapped_{timestamp}_{os.path.basename(path)}")
+        self._write_csv(remapped_filepath, header, [rows[position] for position in patched_positions])
+        return remapped_filepath
+
+    @staticmethod
+    def _locations(conn, sku: str) -> dict[str, list[int]]:
+        """Reads the indexed row positions of one SKU within an open connection."""
+        locations = {}
+        for row in conn.execute('SELECT file, position FROM unmapped_rows WHERE sku = ? ORDER BY file, position',
+                                (str(sku),)):
+            locations.setdefault(row['file'], []).append(row['position'])
+        return locations
+
+    @staticmethod
+    def _write_csv(filepath: str, header: list[str], rows: list[list[str]]):
+        """Atomically writes rows to a CSV file in the format pandas produces."""
+        def write(outfile):
+            writer = csv.writer(outfile, lineterminator='\n')
+            writer.writerow(header)
+            writer.writerows(rows)
+        replace_file(filepath, write)
@@ -0,0 +1,160 @@
+from __future__ import annotations
+import os
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING
+from wms_storage import sqlite_connection
+
+# pandas is only needed by update(); the stdlib fast path uses update_rows().
+if TYPE_CHECKING:
+    import pandas as pd
+
+AGGREGATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS unmapped_sku_files (
+    sku TEXT NOT NULL,
+    file TEXT NOT NULL,
+    occurrences INTEGER NOT NULL,
+    units REAL NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    source TEXT NOT NULL,
+    PRIMARY KEY (sku, file)
+);
+CREATE INDEX IF NOT EXISTS unmapped_sku_files_by_file ON unmapped_sku_files (file);
+CREATE TABLE IF NOT EXISTS unmapped_skus (
+    sku TEXT PRIMARY KEY,
+    occurrences INTEGER NOT NULL,
+    units REAL NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    source TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS unmapped_skus_by_impact ON unmapped_skus (units DESC, occurrences DESC, sku);
+"""
+
+def _number(value) -> int | float:
+    """Parses a stored count, keeping whole numbers as int."""
+    value = float(value or 0)
+    return int(value) if value.is_integer() else value
+
+class UnmappedSKUTracker:
+    """
+    Keeps a persistent, cross-upload aggregate of unmapped SKUs.
+
+    The aggregate is stored per SKU and processed file, so saving the same
+    processed file again replaces its contribution instead of adding to it.
+    A per-SKU rollup of those rows, indexed by impact, holds how many sales
+    rows referenced each SKU, the units affected, when it was first and last
+    seen, and the marketplaces it came from.
+    """
+    def __init__(self, aggregate_filepath: str):
+        """
+        Initializes the tracker with the path of its database.
+
+        Args:
+            aggregate_filepath: The path to the unmapped SKU SQLite database.
+        """
+        self.aggregate_filepath = aggregate_filepath
+
+    def update(self, processed_filepath: str, unmapped_df: pd.DataFrame, source: str | None = None):
+        """
+        Records the unmapped rows of one saved processed file.
+
+        Args:
+            processed_filepath: The path the processed file was saved to.
+            unmapped_df: The processed rows whose SKU has no mapping.
+            source: The marketplace the rows came from, if known.
+        """
+        import pandas as pd
+
+        counts = {}
+        if len(unmapped_df) > 0:
+            batch = (unmapped_df.assign(sku=unmapped_df['sku'].astype(str),
+                                        quantity=pd.to_numeric(unmapped_df['quantity'], errors='coerce').fillna(0))
+                     .groupby('sku', as_index=False)
+                     .agg(occurrences=('sku', 'size'), units=('quantity', 'sum')))
+            counts = {sku: (int(occurrences), _number(units))
+                      for sku, occurrences, units in batch[['sku', 'occurrences', 'units']].itertuples(index=False)}
+        self._replace_file(processed_filepath, counts, source)
+
+    def update_rows(self, processed_filepath: str, unmapped_rows: list[dict], source: str | None = None):
+        """
+        Records the unmapped rows of one saved processed file, given as dicts.
+        A pure-stdlib counterpart of update() for small files.
+        """
+        counts = {}
+        for row in unmapped_rows:
+            if row['sku'] is None:
+                # Rows without a SKU cannot be mapped; pandas' groupby drops them too.
+                continue
+            try:
+                quantity = float(row['quantity'])
+            except (TypeError, ValueError):
+                quantity = 0
+            occurrences, units = counts.get(str(row['sku']), (0, 0))
+            counts[str(row['sku'])] = (occurrences + 1, units + quantity)
+        counts = {sku: (occurrences, _number(units)) for sku, (occurrences, units) in counts.items()}
+        self._replace_file(processed_filepath, counts, source)
+
+    def _replace_file(self, processed_filepath: str, counts: dict, source: str | None):
+        """
+        Replaces the rows of one processed file with new per-SKU counts and
+        refreshes the rollup of only the SKUs that file touched.
+        """
+        if not counts and not os.path.exists(self.aggregate_filepath):
+            return
+
+        path = os.path.abspath(processed_filepath)
+        seen_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        with sqlite_connection(self.aggregate_filepath, AGGREGATE_SCHEMA, write=True) as conn:
+            previous = {row['sku']: row['first_seen'] for row in conn.execute(
+                'SELECT sku, first_seen FROM unmapped_sku_files WHERE file = ?', (path,))}
+            conn.execute('DELETE FROM unmapped_sku_files WHERE file = ?', (path,))
+            conn.executemany(
+                'INSERT INTO unmapped_sku_files (sku, file, occurrences, units, first_seen, last_seen, source) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(sku, path, occurrences, units, previous.get(sku, seen_at), seen_at, source or '')
+                 for sku, (occurrences, units) in counts.items()])
+            for sku in set(previous) | set(counts):
+                self._refresh_rollup(conn, sku)
+
+    @staticmethod
+    def _refresh_rollup(conn, sku: str):
+        """Recomputes the rollup row of one SKU from its per-file rows."""
+        totals = conn.execute(
+            'SELECT COUNT(*) AS files, SUM(occurrences) AS occurrences, SUM(units) AS units, '
+            'MIN(first_seen) AS first_seen, MAX(last_seen) AS last_seen '
+            'FROM unmapped_sku_files WHERE sku = ?', (sku,)).fetchone()
+        if totals['files'] == 0:
+            conn.execute('DELETE FROM unmapped_skus WHERE sku = ?', (sku,))
+            return
+        sources = sorted(row['source'] for row in conn.execute(
+            "SELECT DISTINCT source FROM unmapped_sku_files WHERE sku = ? AND source != ''", (sku,)))
+        conn.execute(
+            'INSERT OR REPLACE INTO unmapped_skus (sku, occurrences, units, first_seen, last_seen, source) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (sku, totals['occurrences'], totals['units'], totals['first_seen'], totals['last_seen'], ','.join(sources)))
+
+    def remove(self, skus: list[str]):
+        """Drops SKUs from the aggregate, e.g. once a mapping has been added for them."""
+        if not os.path.exists(self.aggregate_filepath):
+            return
+        with sqlite_connection(self.aggregate_filepath, AGGREGATE_SCHEMA, write=True) as conn:
+            for table in ('unmapped_sku_files', 'unmapped_skus'):
+                conn.executemany(f'DELETE FROM {table} WHERE sku = ?', [(sku,) for sku in skus])
+
+    def top(self, limit: int = 50, offset: int = 0) -> tuple[list[dict], int]:
+        """
+        Returns one page of unmapped SKUs ranked by impact (affected units,
+        then occurrences).
+
+        Returns:
+            A tuple (rows, total) where total is the number of unmapped SKUs.
+        """
+        if not os.path.exists(self.aggregate_filepath):
+            return [], 0
+        with sqlite_connection(self.aggregate_filepath, AGGREGATE_SCHEMA) as conn:
+            rows = conn.execute(
+                'SELECT sku, occurrences, units, first_seen, last_seen, source FROM unmapped_skus '
+                'ORDER BY units DESC, occurrences DESC, sku LIMIT ? OFFSET ?', (limit, offset)).fetchall()
+            total = conn.execute('SELECT COUNT(*) FROM unmapped_skus').fetchone()[0]
+        return [dict(row, units=_number(row['units'])) for row in rows], total
@@ -0,0 +1,135 @@
+"""
+Headless command-line entry point for cron-driven batch jobs.
+
+    python wms.py map  'uploads/*.csv'
+    python wms.py save 'uploads/*.csv' --output-dir processed
+    python wms.py load 'processed/processed_*.csv' [--resume]
+
+Only the standard library is imported at start-up. Files up to
+FAST_PATH_MAX_BYTES are mapped with the csv-based FastWMSLogic; pandas,
+requests and the Teable loader are imported only when a command needs them.
+"""
+import argparse
+import glob
+import os
+import sys
+
+# Files larger than this are handed to the pandas-based WMSLogic.
+FAST_PATH_MAX_BYTES = 1_000_000
+
+# Prefixes of the files written by 'save' and by /add_mapping re-mapping.
+OUTPUT_PREFIXES = ('processed_', 'remapped_')
+
+def expand_paths(patterns: list[str]) -> list[str]:
+    """Expands glob patterns (quoted to bypass the shell) into a sorted file list."""
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        if not matches:
+            print(f"Warning: No files match '{pattern}'.")
+        paths.extend(matches)
+    return list(dict.fromkeys(paths))
+
+def sales_inputs(args) -> list[str]:
+    """
+    Expands the input patterns of map and save, skipping processed outputs
+    (processed_*/remapped_* files and anything in --output-dir) so that
+    re-running a batch over the same folder does not read them back in.
+    """
+    output_dir = os.path.abspath(args.output_dir) if getattr(args, 'output_dir', None) else None
+    inputs = []
+    for filepath in expand_paths(args.files):
+        in_output_dir = output_dir is not None and os.path.dirname(os.path.abspath(filepath)) == output_dir
+        if os.path.basename(filepath).startswith(OUTPUT_PREFIXES) or in_output_dir:
+            print(f"Skipping {filepath}: it is a processed output, not a sales file.")
+            continue
+        inputs.append(filepath)
+    return inputs
+
+def make_logic(filepath: str, engine: str, mapping_filepath: str):
+    """Picks the stdlib or the pandas implementation for one input file."""
+    if engine == 'auto':
+        small = os.path.exists(filepath) and os.path.getsize(filepath) <= FAST_PATH_MAX_BYTES
+        engine = 'csv' if small else 'pandas'
+    if engine == 'csv':
+        from fast_wms_logic import FastWMSLogic
+        return FastWMSLogic(mapping_filepath)
+    from wms_logic import WMSLogic
+    return WMSLogic(mapping_filepath)
+
+def map_file(filepath: str, args) -> tuple[bool, object]:
+    """Loads and maps one sales file, printing the summary."""
+    logic = make_logic(filepath, args.engine, args.mapping)
+    for step in (lambda: logic.load_and_process_sales_data(filepath), logic.process_data):
+        success, message = step()
+        print(message)
+        if not success:
+            return False, logic
+    return True, logic
+
+def cmd_map(args) -> bool:
+    """Maps each file and prints its summary."""
+    all_ok = True
+    for filepath in sales_inputs(args):
+        print(f"--- {filepath} ---")
+        success, _ = map_file(filepath, args)
+        all_ok = all_ok and success
+    return all_ok
+
+def cmd_save(args) -> bool:
+    """Maps each file and saves the processed result."""
+    all_ok = True
+    for filepath in sales_inputs(args):
+        print(f"--- {filepath} ---")
+        success, logic = map_file(filepath, args)
+        if success:
+            output_dir = args.output_dir or os.path.dirname(filepath)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+            output_path = os.path.join(output_dir, f"processed_{os.path.basename(filepath)}")
+            success, message = logic.save_processed_data(output_path)
+            print(message)
+        all_ok = all_ok and success
+    return all_ok
+
+def cmd_load(args) -> bool:
+    """Loads each processed file into Teable."""
+    from load_data import API_TOKEN, BASE_ID, load_data_to_teable
+
+    if API_TOKEN == "YOUR_TEABLE_API_TOKEN" or BASE_ID == "YOUR_TEABLE_BASE_ID":
+        print("ERROR: Please set the TEABLE_API_TOKEN and TEABLE_BASE_ID environment variables.")
+        return False
+    all_ok = True
+    for filepath in expand_paths(args.files):
+        all_ok = load_data_to_teable(filepath, resume=args.resume) and all_ok
+    return all_ok
+
+def build_parser() -> argparse.ArgumentParser:
+    """Builds the argument parser for the map, save and load commands."""
+    parser = argparse.ArgumentParser(prog='wms', description="Map, save and load marketplace sales files.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    for name, func, help_text in (('map', cmd_map, "Map SKUs and print a summary for each file."),
+                                  ('save', cmd_save, "Map SKUs and save processed_<name>.csv for each file.")):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument('files', nargs='+', help="Sales CSV files or glob patterns.")
+        sub.add_argument('--mapping', default='wms_mapping.csv', help="SKU to MSKU mapping CSV (default: %(default)s).")
+        sub.add_argument('--engine', choices=('auto', 'csv', 'pandas'), default='auto',
+                         help="'csv' is the stdlib fast path; 'auto' uses it for files up to "
+                              f"{FAST_PATH_MAX_BYTES} bytes (default: %(default)s).")
+        if name == 'save':
+            sub.add_argument('--output-dir', help="Directory for processed files (default: next to each input).")
+        sub.set_defaults(func=func)
+
+    sub = subparsers.add_parser('load', help="Load processed files into Teable.")
+    sub.add_argument('files', nargs='+', help="Processed CSV files or glob patterns.")
+    sub.add_argument('--resume', action='store_true', help="Continue interrupted loads from the last committed batch.")
+    sub.set_defaults(func=cmd_load)
+    return parser
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    return 0 if args.func(args) else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
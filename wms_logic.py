@@ -1,6 +1,8 @@
 import pandas as pd
 from sku_mapper import SKUMapper
-from sales_data_processor import process_sales_file
+from sales_data_processor import process_sales_file, summarize_mapping
+from unmapped_sku_tracker import UnmappedSKUTracker
+from unmapped_row_index import UnmappedRowIndex
 import os
 
 class WMSLogic:
@@ -8,11 +10,15 @@ class WMSLogic:
     Handles the core business logic for the WMS application,
     independent of the GUI.
     """
-    def __init__(self):
-        self.mapper = SKUMapper('wms_mapping.csv')
+    def __init__(self, mapping_filepath: str = 'wms_mapping.csv'):
+        self.mapper = SKUMapper(mapping_filepath)
+        self.unmapped_tracker = UnmappedSKUTracker('unmapped_skus.db')
+        self.row_index = UnmappedRowIndex('unmapped_rows.db')
         self.sales_df = None
         self.processed_df = None
         self.unmapped_skus = []
+        self.unmapped_df = None
+        self.unmapped_locations = {}
 
     def load_and_process_sales_data(self, filepath: str) -> tuple[bool, str]:
         """
@@ -55,13 +61,14 @@ class WMSLogic:
         mapped_count = self.processed_df['msku'].notna().sum()
         total_count = len(self.processed_df)
 
-        self.unmapped_skus = self.processed_df[self.processed_df['msku'].isna()]['sku'].unique()
+        unmapped_mask = self.processed_df['msku'].isna().to_numpy()
+        self.unmapped_df = self.processed_df[unmapped_mask]
+        self.unmapped_skus = self.unmapped_df['sku'].unique()
+        # Row positions of each unmapped SKU; like the aggregate, they are recorded once the file is saved.
+        positions = pd.Series(unmapped_mask.nonzero()[0], index=self.unmapped_df['sku'].astype(str))
+        self.unmapped_locations = positions.groupby(level=0).agg(list).to_dict()
 
-        message = f"Processing complete. Mapped {mapped_count} of {total_count} records."
-        if len(self.unmapped_skus) > 0:
-            message += f"\nFound {len(self.unmapped_skus)} unmapped SKUs: {', '.join(map(str, self.unmapped_skus))}"
-
-        return True, message
+        return True, summarize_mapping(mapped_count, total_count, self.unmapped_skus)
 
     def save_processed_data(self, filepath: str) -> tuple[bool, str]:
         """
@@ -78,6 +85,20 @@ class WMSLogic:
 
         try:
             self.processed_df.to_csv(filepath, index=False)
-            return True, f"Successfully saved processed data to: {filepath}"
         except Exception as e:
             return False, f"Error saving file: {e}"
+
+        # The CSV is saved at this point; failing to index it is reported
+        # as a warning rather than as a failed save.
+        message = f"Successfully saved processed data to: {filepath}"
+        try:
+            self.row_index.record(filepath, self.unmapped_locations)
+        except Exception as e:
+            print(f"Warning: could not update the unmapped row index for {filepath}: {e}")
+            message += f" Warning: could not update the unmapped row index: {e}"
+        try:
+            self.unmapped_tracker.update(filepath, self.unmapped_df, source=self.sales_df.attrs.get('marketplace'))
+        except Exception as e:
+            print(f"Warning: could not update the unmapped SKU aggregate for {filepath}: {e}")
+            message += f" Warning: could not update the unmapped SKU aggregate: {e}"
+        return True, message
@@ -0,0 +1,53 @@
+import contextlib
+import os
+import sqlite3
+import tempfile
+
+@contextlib.contextmanager
+def sqlite_connection(db_filepath: str, schema: str, write: bool = False):
+    """
+    Opens a state database, creating its schema if needed.
+
+    With write=True the block runs in a single immediate transaction, so
+    concurrent read-modify-write updates from other threads or processes
+    are serialized rather than lost.
+
+    Args:
+        db_filepath: The path to the SQLite database file.
+        schema: CREATE ... IF NOT EXISTS statements for the database.
+        write: Whether the block modifies the database.
+    """
+    conn = sqlite3.connect(db_filepath, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.executescript(schema)
+        if not write:
+            yield conn
+            return
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+    finally:
+        conn.close()
+
+def replace_file(filepath: str, write):
+    """
+    Atomically replaces a file with the content written by write(fileobj).
+
+    The content goes to a uniquely named temporary file in the same directory
+    first, so concurrent writers never collide on a temporary name.
+    """
+    directory = os.path.dirname(os.path.abspath(filepath))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(filepath)}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', newline='') as f:
+            write(f)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise